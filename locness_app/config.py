@@ -1,32 +1,39 @@
 import os
-import toml
+import tomllib
 
 DEFAULTS = {
     "update_frequency": 10,
     "resample": "1min",
-    "file_path": "oceanographic_data.duckdb"
+    "file_path": "oceanographic_data.duckdb",
+    "db_table": "underway_summary"
 }
 
 CONFIG_FILE = "config.toml"
 
 if os.path.exists(CONFIG_FILE):
-    config = toml.load(CONFIG_FILE)
+    with open(CONFIG_FILE, "rb") as f:
+        config = tomllib.load(f)
 else:
     config = {}
 
+def _env_value(key):
+    val = os.environ[key.upper()]
+    if key == "update_frequency":
+        try:
+            return int(val)
+        except ValueError:
+            pass
+    return val
+
+# Merged once at import: environment (upper case, e.g. UPDATE_FREQUENCY) over config file over defaults
+settings = {
+    **DEFAULTS,
+    **config,
+    **{key: _env_value(key) for key in DEFAULTS if key.upper() in os.environ},
+}
+
 def get_config_value(key):
-    env_key = key.upper()
-    if env_key in os.environ:
-        val = os.environ[env_key]
-        if key == "update_frequency":
-            try:
-                return int(val)
-            except Exception:
-                pass
-        return val
-    if key in config:
-        return config[key]
-    return DEFAULTS[key]
+    return settings[key]
 
 update_frequency = get_config_value("update_frequency")
 resample = get_config_value("resample")
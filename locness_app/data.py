@@ -1,59 +1,164 @@
+import logging
 import sqlite3
+import numpy as np
 import pandas as pd
 import streamlit as st
+from locness_app.config import update_frequency
+from locness_app.migrate import timestamp_index
 
-def get_data_relation(db_path, db_table, time_cutoff=None):
-    base_query = f"SELECT * FROM {db_table}"
+logger = logging.getLogger(__name__)
+
+# Measurement columns averaged into each time bucket when resampling
+DATA_COLUMNS = ("latitude", "longitude", "temp", "salinity", "rho_ppb", "ph_corrected", "ph_corrected_ma")
+# Columns read from the table; anything else in the row is never plotted
+PLOT_COLUMNS = ("datetime_utc",) + DATA_COLUMNS
+# float32 halves frame memory and is ample for sensor precision (~0.4 m in lat/lon)
+DATA_DTYPE = np.float32
+
+def resample_seconds(resample_freq):
+    """Convert a pandas frequency string such as "1min" to a bucket width in seconds."""
+    return int(pd.to_timedelta(resample_freq).total_seconds())
+
+def to_epoch_seconds(value):
+    """Coerce a datetime-like value to integer seconds since the epoch."""
+    if isinstance(value, pd.Timestamp) or hasattr(value, 'timestamp'):
+        return int(value.timestamp())
+    return int(value)
+
+@st.cache_resource
+def get_conn(db_path, db_table):
+    """Open one read-only connection per database, shared across reruns."""
+    # Errors propagate, so cache_resource never keeps a half-configured connection
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    # The resampled query's GROUP BY sorts through a temp B-tree; keep it off disk
+    conn.execute("PRAGMA temp_store=MEMORY")
+    check_database(conn, db_path, db_table)
+    return conn
+
+def check_database(conn, db_path, db_table):
+    """Warn if the one-time setup in locness_app.migrate has not been run on this database."""
+    # The database belongs to the logger; only report missing setup
+    index = timestamp_index(db_table)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)).fetchone() is None:
+        logger.warning("%s has no %s index; time-window reads will scan the whole table. "
+                       "Run python -m locness_app.migrate", db_path, index)
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode != "wal":
+        logger.warning("%s uses journal_mode=%s; logger commits will block reads. "
+                       "Run python -m locness_app.migrate", db_path, journal_mode)
+
+def get_data_version(conn):
+    """Return SQLite's change counter, which moves only when another connection commits."""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+def get_data_relation(db_path, db_table, time_cutoff=None, resample_freq=None, inclusive=True, time_end=None):
+    if resample_freq:
+        # Bucket in SQL with integer arithmetic so only one row per bucket leaves SQLite;
+        # the CAST keeps the division integral even if the column has REAL affinity
+        bucket = resample_seconds(resample_freq)
+        averages = ", ".join(f"AVG({col}) AS {col}" for col in DATA_COLUMNS)
+        base_query = f"SELECT CAST(datetime_utc AS INTEGER) / {bucket} * {bucket} AS datetime_utc, {averages} FROM {db_table}"
+    else:
+        base_query = f"SELECT {', '.join(PLOT_COLUMNS)} FROM {db_table}"
+    conditions = []
     params = []
     if time_cutoff:
-        # Ensure time_cutoff is an integer timestamp
-        if isinstance(time_cutoff, pd.Timestamp) or hasattr(time_cutoff, 'timestamp'):
-            time_cutoff = int(time_cutoff.timestamp())
-        base_query += " WHERE datetime_utc >= ?"
-        params.append(time_cutoff)
+        conditions.append("datetime_utc >= ?" if inclusive else "datetime_utc > ?")
+        params.append(to_epoch_seconds(time_cutoff))
+    if time_end:
+        conditions.append("datetime_utc < ?")
+        params.append(to_epoch_seconds(time_end))
+    if conditions:
+        base_query += " WHERE " + " AND ".join(conditions)
+    if resample_freq:
+        # Drop buckets where any average is NULL, e.g. during a sensor dropout
+        base_query += " GROUP BY 1 HAVING " + " AND ".join(f"COUNT({col}) > 0" for col in DATA_COLUMNS)
     base_query += " ORDER BY datetime_utc"
     return base_query, params
 
-@st.cache_data(ttl=3600, show_spinner=True)
+def read_data(conn, query, params):
+    """Run a query built by get_data_relation and index the result by epoch seconds."""
+    cursor = conn.execute(query, params)
+    columns = [col[0] for col in cursor.description]
+    # float64 holds epoch seconds exactly and turns NULL into NaN
+    rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, len(columns))
+    # Index stays in epoch seconds; plots convert only the points they draw
+    index = pd.Index(rows[:, 0].astype(np.int64), name='datetime_utc')
+    # Column-major, so each column's to_numpy() in the plots is a contiguous view
+    values = rows[:, 1:].astype(DATA_DTYPE, order='F')
+    return pd.DataFrame(values, index=index, columns=columns[1:], copy=False)
+
+@st.cache_data(ttl=update_frequency, max_entries=8, show_spinner=False)
+def read_window(db_path, db_table, time_cutoff=None, resample_freq=None):
+    """Read a whole time window; shared across sessions so reloads and new viewers reuse it."""
+    query, params = get_data_relation(db_path, db_table, time_cutoff, resample_freq)
+    return read_data(get_conn(db_path, db_table), query, params)
+
 def get_data_for_plotting(db_path, db_table, time_cutoff=None, resample_freq=None):
-    conn = sqlite3.connect(db_path)
-    query, params = get_data_relation(db_path, db_table, time_cutoff)
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    if not df.empty:
-        df['datetime_utc'] = pd.to_datetime(df['datetime_utc'], unit='s')
-        df.set_index('datetime_utc', inplace=True)
-        if resample_freq:
-            columns_to_aggregate = [col for col in df.columns if col != 'datetime_utc']
-            df = df.resample(resample_freq).mean()[columns_to_aggregate].dropna()
+    """Return plot data, fetching only rows newer than this session's cached frame."""
+    conn = get_conn(db_path, db_table)
+    cutoff = to_epoch_seconds(time_cutoff) if time_cutoff else None
+    key = (db_path, db_table, resample_freq)
+    # Read before querying so a commit landing mid-read is picked up next time
+    data_version = get_data_version(conn)
+    cached = st.session_state.get("df")
+    cached_key, cached_cutoff, cached_version = st.session_state.get("df_query", (None, None, None))
+    if cached is None or cached.empty or cached_key != key:
+        # Bucket the cutoff so reads within one refresh period share a cache key
+        window_start = cutoff - cutoff % update_frequency if cutoff is not None else None
+        df = read_window(db_path, db_table, window_start, resample_freq)
+        if not df.empty:
+            # The shared read can be up to one refresh period old
+            df = update_with_new_data(conn, db_table, df, resample_freq)
+    else:
+        df = cached
+        if cached_cutoff is not None and (cutoff is None or cutoff < cached_cutoff):
+            # The window grew back past what we hold: read just the older span
+            df = prepend_older_data(conn, db_table, df, cutoff, resample_freq)
+        if data_version != cached_version:
+            df = update_with_new_data(conn, db_table, df, resample_freq)
+    if cutoff is not None:
+        # Drop the sorted prefix the cutoff has slid past, including a leading bucket
+        # that straddles it
+        df = df.iloc[df.index.searchsorted(cutoff):]
+    st.session_state["df"] = df
+    st.session_state["df_query"] = (key, cutoff, data_version)
     return df
 
 def get_total_records(db_path, db_table):
     """Fetch the total number of records in the data source."""
-    conn = sqlite3.connect(db_path)
-    query = f"SELECT COUNT(*) FROM {db_table}"
-    cursor = conn.cursor()
-    cursor.execute(query)
-    total_records = cursor.fetchone()[0]
-    conn.close()
+    conn = get_conn(db_path, db_table)
+    # COUNT(*) is a full scan, so only rerun it after a write
+    key = (db_path, db_table, get_data_version(conn))
+    cached_key, total_records = st.session_state.get("total_records", (None, None))
+    if cached_key != key:
+        total_records = conn.execute(f"SELECT COUNT(*) FROM {db_table}").fetchone()[0]
+        st.session_state["total_records"] = (key, total_records)
     return total_records
 
-def update_with_new_data(db_path, db_table, current_df):
-    """Check for new data in the database since the last timestamp in current_df and append it."""
+def update_with_new_data(conn, db_table, current_df, resample_freq=None):
+    """Fetch rows newer than the last timestamp in current_df and append them."""
     if current_df.empty:
-        return get_data_for_plotting(db_path, db_table)
+        query, params = get_data_relation(None, db_table, resample_freq=resample_freq)
+        return read_data(conn, query, params)
     last_timestamp = current_df.index.max()
-    # Convert last_timestamp to integer seconds
-    if isinstance(last_timestamp, pd.Timestamp) or hasattr(last_timestamp, 'timestamp'):
-        last_timestamp = int(last_timestamp.timestamp())
-    conn = sqlite3.connect(db_path)
-    query = f"SELECT * FROM {db_table} WHERE datetime_utc > ? ORDER BY datetime_utc"
-    new_data = pd.read_sql_query(query, conn, params=[last_timestamp])
-    conn.close()
+    # The last bucket may still be filling, so re-read it too
+    query, params = get_data_relation(None, db_table, last_timestamp, resample_freq, inclusive=bool(resample_freq))
+    new_data = read_data(conn, query, params)
     if not new_data.empty:
-        new_data['datetime_utc'] = pd.to_datetime(new_data['datetime_utc'], unit='s')
-        new_data.set_index('datetime_utc', inplace=True)
-        updated_df = pd.concat([current_df, new_data])
-        updated_df = updated_df[~updated_df.index.duplicated(keep='last')]
-        return updated_df
+        # Frames are sorted; a re-read bucket can only overlap the tail
+        keep = current_df.index.searchsorted(new_data.index[0])
+        return pd.concat([current_df.iloc[:keep], new_data])
+    return current_df
+
+def prepend_older_data(conn, db_table, current_df, time_cutoff, resample_freq=None):
+    """Fetch rows from time_cutoff up to the first timestamp in current_df and prepend them."""
+    # current_df was trimmed to its own cutoff, so its first bucket is complete and can be kept
+    query, params = get_data_relation(None, db_table, time_cutoff, resample_freq, time_end=current_df.index[0])
+    older_data = read_data(conn, query, params)
+    if not older_data.empty:
+        return pd.concat([older_data, current_df])
     return current_df
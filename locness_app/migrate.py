@@ -0,0 +1,35 @@
+"""One-time setup for the logger's database, run by whoever owns the writer.
+
+    python -m locness_app.migrate [db_path [db_table]]
+
+Adds the datetime_utc index the dashboard's time-window reads use and switches the
+journal to WAL so the logger keeps writing while the dashboard reads. Both steps are
+idempotent. Run it before starting the logger: building the index holds the write lock.
+The dashboard itself never writes to the database.
+"""
+import sqlite3
+import sys
+from locness_app.config import file_path, db_table as default_table
+
+def timestamp_index(db_table):
+    """Name of the datetime_utc index for db_table."""
+    return f"idx_{db_table}_ts"
+
+def migrate_database(db_path, db_table):
+    """Create the timestamp index and enable WAL on db_path."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {timestamp_index(db_table)} ON {db_table}(datetime_utc)")
+        conn.commit()
+        journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode != "wal":
+            raise sqlite3.OperationalError(f"could not switch {db_path} to WAL (journal_mode={journal_mode})")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    db_path = args[0] if args else file_path
+    db_table = args[1] if len(args) > 1 else default_table
+    migrate_database(db_path, db_table)
+    print(f"{db_path}: {timestamp_index(db_table)} present, journal_mode=wal")
@@ -1,27 +1,104 @@
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+import streamlit as st
+
+# Roughly one bucket per horizontal pixel of a full-width plot
+M4_BINS = 1500
+
+# Map zoom for a track extent (degrees): below each threshold use the matching level
+ZOOM_THRESHOLDS = np.array([0.002, 0.01, 0.05, 0.2])
+ZOOM_LEVELS = np.array([15, 13, 11, 9, 7])
+
+# Trace colors, cycled by subplot
+COLORS = tuple(px.colors.qualitative.Set1)
+
+# Below this many points the track colors by its full range, not the 5-95% quantiles
+QUANTILE_MIN_POINTS = 200
+
+def frame_key(df):
+    """Cheap cache identity for a time-sorted plot frame.
+
+    Frames only grow at the end or get trimmed at the start, so the length and both end
+    timestamps identify one; the last row's values catch a resampled bucket still filling.
+    """
+    if df.empty:
+        return 0
+    return (len(df), df.index[0], df.index[-1], df.iloc[-1].to_numpy().tobytes())
+
+# Figures are rebuilt only when their data or options change, not on every rerun
+cache_figure = st.cache_data(hash_funcs={pd.DataFrame: frame_key}, max_entries=8, show_spinner=False)
+
+def m4_buckets(t, n_bins=M4_BINS):
+    """Start positions of n_bins equal-width buckets over sorted times t, or None if t is already small."""
+    if len(t) <= 4 * n_bins:
+        return None
+    t = t.view(np.int64)
+    span = max(t[-1] - t[0], 1)
+    # Empty buckets share a start position and collapse in np.unique
+    edges = t[0] + np.arange(n_bins) * (span / n_bins)
+    return np.unique(np.searchsorted(t, edges))
+
+def m4_indices(v, starts):
+    """Positions of the first, last, min and max point of each bucket (M4 downsampling).
+
+    Keeps the drawn line shape of a time series at ~4 points per pixel column.
+    starts comes from m4_buckets and can be shared by every column of a frame;
+    NaNs in v are ignored for min/max.
+    """
+    n = len(v)
+    if starts is None:
+        return np.arange(n)
+    ends = np.r_[starts[1:], n] - 1
+    counts = ends - starts + 1
+    pos = np.arange(n)
+    # Locate the first position that attains each bucket's min/max; all-NaN buckets yield n
+    mins = np.repeat(np.fmin.reduceat(v, starts), counts)
+    maxs = np.repeat(np.fmax.reduceat(v, starts), counts)
+    argmins = np.minimum.reduceat(np.where(v == mins, pos, n), starts)
+    argmaxs = np.minimum.reduceat(np.where(v == maxs, pos, n), starts)
+    picked = np.unique(np.concatenate([starts, ends, argmins, argmaxs]))
+    return picked[picked < n]
 
 def create_map_plot(df, selected_params):
+    # Only the first parameter colors the track, so toggling the others reuses the cached map
+    color_param = selected_params[0] if selected_params and selected_params[0] in df.columns else None
+    return build_map_plot(df, color_param)
+
+@cache_figure
+def build_map_plot(df, color_param):
     if df.empty:
         return go.Figure()
     track_data = df
     fig = go.Figure()
-    if selected_params and selected_params[0] in track_data.columns:
-        color_param = selected_params[0]
-        color_vals = track_data[color_param]
-        qmin = color_vals.quantile(0.05)
-        qmax = color_vals.quantile(0.95)
-        if qmin == qmax:
-            qmin = color_vals.min()
-            qmax = color_vals.max()
+    # Decimate the drawn track like the time series; bounds and extent still use every point
+    buckets = m4_buckets(track_data.index.to_numpy())
+    lats = track_data['latitude'].to_numpy()
+    lons = track_data['longitude'].to_numpy()
+    if color_param:
+        color_arr = track_data[color_param].to_numpy()
+        if np.isnan(color_arr).all():
+            # Nothing to scale by, e.g. a sensor dropout; leave the range to Plotly
+            qmin = qmax = None
+        elif len(color_arr) < QUANTILE_MIN_POINTS:
+            # Too few points for the tails to be outliers; take the full range without sorting
+            qmin, qmax = np.nanmin(color_arr), np.nanmax(color_arr)
+        else:
+            # Both bounds from one sort
+            qmin, qmax = np.nanquantile(color_arr, [0.05, 0.95])
+            if qmin == qmax:
+                qmin, qmax = np.nanmin(color_arr), np.nanmax(color_arr)
+        # Keeping each bucket's min/max of the color parameter preserves its extremes on the map
+        keep = m4_indices(color_arr, buckets)
         scatter = go.Scattermap(
-            lat=track_data['latitude'],
-            lon=track_data['longitude'],
+            lat=lats[keep],
+            lon=lons[keep],
             mode='markers+lines',
             marker=dict(
                 size=10,
-                color=color_vals,
+                color=color_arr[keep],
                 colorscale='Viridis',
                 cmin=qmin,
                 cmax=qmax,
@@ -29,17 +106,18 @@ def create_map_plot(df, selected_params):
                 showscale=True
             ),
             name=f'Track ({color_param})',
-            text=[f"{color_param}: {v:.2f}" for v in color_vals],
+            # Formatted on the client from the color array
             hovertemplate=
-                'Lat: %{latitude:.4f}<br>' +
-                'Lon: %{longitude:.4f}<br>' +
+                'Lat: %{lat:.4f}<br>' +
+                'Lon: %{lon:.4f}<br>' +
                 f'{color_param}: %{{marker.color:.2f}}<extra></extra>'
         )
         fig.add_trace(scatter)
     else:
+        keep = m4_indices(lats, buckets)
         fig.add_trace(go.Scattermap(
-            lat=track_data['latitude'],
-            lon=track_data['longitude'],
+            lat=lats[keep],
+            lon=lons[keep],
             mode='lines',
             line=dict(width=2, color='blue'),
             name='Track',
@@ -54,33 +132,22 @@ def create_map_plot(df, selected_params):
             marker=dict(size=15, color='red'),
             name='Current Position',
             hovertemplate='<b>Current Position</b><br>' +
-                         'Lat: %{latitude:.4f}<br>' +
-                         'Lon: %{longitude:.4f}<br>' +
+                         'Lat: %{lat:.4f}<br>' +
+                         'Lon: %{lon:.4f}<br>' +
                          f'Temp: {latest["temp"]:.1f}°C<br>' +
                          f'Salinity: {latest["salinity"]:.1f}<br>' +
-                         f'pH: {latest["ph_corrected"]:.2f}<extra></extra>' +
+                         f'pH: {latest["ph_corrected"]:.2f}<br>' +
                          f'Average pH: {latest["ph_corrected_ma"]:.2f}<extra></extra>'
         ))
     if not track_data.empty:
-        min_lat = track_data['latitude'].min()
-        max_lat = track_data['latitude'].max()
-        min_lon = track_data['longitude'].min()
-        max_lon = track_data['longitude'].max()
+        min_lat, max_lat = np.nanmin(lats), np.nanmax(lats)
+        min_lon, max_lon = np.nanmin(lons), np.nanmax(lons)
         center_lat = (min_lat + max_lat) / 2
         center_lon = (min_lon + max_lon) / 2
         lat_range = max_lat - min_lat
         lon_range = max_lon - min_lon
         max_range = max(lat_range, lon_range)
-        if max_range < 0.002:
-            zoom = 15
-        elif max_range < 0.01:
-            zoom = 13
-        elif max_range < 0.05:
-            zoom = 11
-        elif max_range < 0.2:
-            zoom = 9
-        else:
-            zoom = 7
+        zoom = int(ZOOM_LEVELS[np.searchsorted(ZOOM_THRESHOLDS, max_range, side='right')])
     else:
         center_lat, center_lon = 42.3601, -71.0589
         zoom = 12
@@ -91,10 +158,13 @@ def create_map_plot(df, selected_params):
             zoom=zoom
         ),
         height=650,
+        # Keep the user's pan/zoom when the figure data changes
+        uirevision="map",
         margin=dict(t=10, b=10, l=10, r=10)  # Adjust margins to reduce whitespace
     )
     return fig
 
+@cache_figure
 def create_timeseries_plot(df, selected_params):
     if df.empty:
         return go.Figure()
@@ -105,15 +175,18 @@ def create_timeseries_plot(df, selected_params):
         shared_xaxes=True,
         vertical_spacing=0.05
     )
-    colors = px.colors.qualitative.Set1
+    times = df.index.to_numpy()
+    buckets = m4_buckets(times)
     for i, param in enumerate(selected_params):
         if param in df.columns:
+            values = df[param].to_numpy()
+            keep = m4_indices(values, buckets)
             fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df[param],
+                go.Scattergl(
+                    x=times[keep].astype('datetime64[s]'),
+                    y=values[keep],
                     name=param,
-                    line=dict(color=colors[i % len(colors)]),
+                    line=dict(color=COLORS[i % len(COLORS)]),
                     mode='lines+markers',
                     marker=dict(size=3)
                 ),
@@ -122,6 +195,10 @@ def create_timeseries_plot(df, selected_params):
     fig.update_layout(
         height=150 + 200 * len(selected_params),
         showlegend=False,
+        # Unified hover over large WebGL traces is very slow
+        hovermode='closest',
+        # Keep zoom and range selection across refreshes, but reset when the subplots change
+        uirevision=",".join(selected_params),
         margin=dict(t=10, b=10, l=10, r=10)  # Adjust margins to reduce whitespace
     )
     for i in range(1, len(selected_params) + 1):
@@ -142,17 +219,20 @@ def create_timeseries_plot(df, selected_params):
         )
     return fig
 
+@cache_figure
 def create_ph_timeseries_plot(df):
     if df.empty:
         return go.Figure()
-    colors = px.colors.qualitative.Set1
     fig = go.Figure()
+    times = df.index.to_numpy()
+    values = df['ph_corrected_ma'].to_numpy()
+    keep = m4_indices(values, m4_buckets(times))
     fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df['ph_corrected_ma'],
+        go.Scattergl(
+            x=times[keep].astype('datetime64[s]'),
+            y=values[keep],
             name='pH moving average',
-            line=dict(color=colors[0]),
+            line=dict(color=COLORS[0]),
             mode='lines+markers',
             marker=dict(size=3)
         ),
@@ -160,6 +240,8 @@ def create_ph_timeseries_plot(df):
     fig.update_layout(
         height=250,
         showlegend=False,
+        hovermode='closest',
+        uirevision="ph",
         margin=dict(t=10, b=10, l=10, r=10)  # Adjust margins to reduce whitespace
     )
     fig.update_xaxes(
@@ -1,5 +1,4 @@
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 import pandas as pd
 from datetime import datetime, timedelta
 from locness_app.config import update_frequency, resample as RESAMPLE, file_path as FILE_PATH, db_table as DB_TABLE
@@ -7,7 +6,6 @@ from locness_app.data import get_data_for_plotting, get_total_records
 from locness_app.plots import create_timeseries_plot, create_ph_timeseries_plot, create_map_plot
 
 
-# TODO: incremental automatic update
 # TODO: automatically resample if plotting more than MAX_POINTS
 # TODO: deployment view
 # TODO: add more error handling for database connections and queries
@@ -20,15 +18,6 @@ from locness_app.plots import create_timeseries_plot, create_ph_timeseries_plot,
 # TODO: add drifters
 # TODO: add more vis: ph vs rhodamine, salinity vs temperature, etc.
 
-# Streamlit auto-refresh configuration
-# Autorefresh toggle
-autorefresh_enabled = st.sidebar.checkbox("Enable auto-refresh", value=False)
-if autorefresh_enabled:
-    refresh_count = st_autorefresh(interval=update_frequency * 1000, key="data_refresh")
-
-# Manual refresh button
-st.sidebar.button("Refresh now")
-
 # Page configuration
 st.set_page_config(
     page_title="LOCNESS Underway Dashboard",
@@ -36,22 +25,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# Streamlit auto-refresh configuration
+# Autorefresh toggle; refreshes rerun only the status and live panels below, not the sidebar controls
+autorefresh_enabled = st.sidebar.checkbox("Enable auto-refresh", value=False)
+
+# Manual refresh button
+st.sidebar.button("Refresh now")
+
 # Streamlit UI
 
 # Sidebar controls
 st.sidebar.header("Configuration")
 
-# Data selection
-st.sidebar.subheader("Data Selection")
-available_params = ['temp', 'salinity', 'rho_ppb', 'ph_corrected', 'ph_corrected_ma']
-selected_params = st.sidebar.multiselect(
-    "Select parameters to plot",
-    available_params,
-    default=['rho_ppb', 'ph_corrected']
-)
-
-# Resampling options
-st.sidebar.subheader("Data Resampling")
+# Selection widgets sit in a form so dragging the slider or editing the list does not
+# rerun and re-query on every intermediate value; changes apply together on submit
 resample_options = {
     'No resampling': None,
     '10 seconds': '10s',
@@ -61,109 +48,139 @@ resample_options = {
     '1 hour': '1h',
     '6 hours': '6h'
 }
-default_resample_index = list(resample_options.values()).index(RESAMPLE) if RESAMPLE in resample_options.values() else 2
-selected_resample = st.sidebar.selectbox(
-    "Resample to:",
-    list(resample_options.keys()),
-    index=default_resample_index
-)
 
-# Time range
-st.sidebar.subheader("Time Range")
-time_range_hours = st.sidebar.slider(
-    "Hours of data to show",
-    min_value=1,
-    max_value=168,  # 1 week
-    value=24
-)
+with st.sidebar.form("data_options"):
+    # Data selection
+    st.subheader("Data Selection")
+    available_params = ['temp', 'salinity', 'rho_ppb', 'ph_corrected', 'ph_corrected_ma']
+    selected_params = st.multiselect(
+        "Select parameters to plot",
+        available_params,
+        default=['rho_ppb', 'ph_corrected']
+    )
+
+    # Resampling options
+    st.subheader("Data Resampling")
+    default_resample_index = list(resample_options.values()).index(RESAMPLE) if RESAMPLE in resample_options.values() else 2
+    selected_resample = st.selectbox(
+        "Resample to:",
+        list(resample_options.keys()),
+        index=default_resample_index
+    )
+
+    # Time range
+    st.subheader("Time Range")
+    time_range_hours = st.slider(
+        "Hours of data to show",
+        min_value=1,
+        max_value=168,  # 1 week
+        value=24
+    )
+
+    st.form_submit_button("Apply")
+
+def load_data():
+    """Update the data query based on user selections."""
+    time_cutoff = datetime.now() - timedelta(hours=time_range_hours)
+    return get_data_for_plotting(db_path=FILE_PATH, db_table=DB_TABLE, time_cutoff=time_cutoff, resample_freq=resample_options[selected_resample])
+
+# With auto-refresh on, only the two fragments below rerun on the timer. A fragment may not
+# write into the sidebar from outside it, so the status is its own fragment run inside it;
+# both read through this session's cached frame
+run_every = update_frequency if autorefresh_enabled else None
 
 # Data Status
 st.sidebar.subheader("Data Status")
-status_container = st.sidebar.empty()
 
-# Main content area
-col1, col2 = st.columns([2, 1])
-
-# Tabs for main content
-tab_deployment , tab_main= st.tabs(["Deployment", "Dashboard"])
-
-# Create containers for dynamic content
-map_container = st.empty()
-plot_container = st.empty()
-stats_container = st.empty()
+@st.fragment(run_every=run_every)
+def status_panel():
+    df = load_data()
+    last_update = datetime.now()
 
-# Update the data query based on user selections
-time_cutoff = datetime.now() - timedelta(hours=time_range_hours)
-df = get_data_for_plotting(db_path=FILE_PATH, db_table=DB_TABLE, time_cutoff=time_cutoff, resample_freq=resample_options[selected_resample])
-
-last_update = datetime.now()
-
-# Add total number of records in the data source
-total_records = get_total_records(db_path=FILE_PATH, db_table=DB_TABLE)
-# Update status
-with status_container:
+    # Add total number of records in the data source
+    total_records = get_total_records(db_path=FILE_PATH, db_table=DB_TABLE)
+    # Update status
     if not df.empty:
         st.success(f"✅ Data loaded: {len(df)} records")
         st.markdown(
             f"✅ Data loaded: {len(df)} records  \n"
             f"**Total records in data source:** {total_records}  \n"
             f"**Last update:** {last_update.strftime('%H:%M:%S')}  \n"
-            f"**Latest data:** {df.index[-1].strftime('%H:%M:%S')}  \n"
+            f"**Latest data:** {pd.to_datetime(df.index[-1], unit='s').strftime('%H:%M:%S')}  \n"
         )
     else:
         st.warning("⚠️ No data available")
 
-with tab_main:
-    # Display visualizations
-    if not df.empty and selected_params:
-        st.plotly_chart(create_map_plot(df, selected_params), use_container_width=True)
-        st.plotly_chart(create_timeseries_plot(df, selected_params), use_container_width=True)
-        st.subheader("Current Statistics")
-        if not df.empty:
-            latest_data = df.iloc[-1]
-            cols = st.columns(len(selected_params))
-            for i, param in enumerate(selected_params):
-                with cols[i]:
-                    if param in df.columns:
-                        value = latest_data[param]
-                        mean_val = df[param].mean()
-                        st.metric(
-                            label=param.capitalize(),
-                            value=f"{value:.2f}",
-                            delta=f"{value - mean_val:.2f} vs avg"
-                        )
-    elif not selected_params:
-        st.info("Please select at least one parameter to visualize from the sidebar.")
-
-with tab_deployment:
-
-    # Time series plot for pH Corrected MA
-    ph_timeseries_col, ph_indicator_col = st.columns([3, 1])
-
-    with ph_timeseries_col:
+with st.sidebar:
+    status_panel()
+
+# Main content area
+col1, col2 = st.columns([2, 1])
+
+# Live data panel
+@st.fragment(run_every=run_every)
+def live_panel():
+    # Tabs for main content
+    tab_deployment , tab_main= st.tabs(["Deployment", "Dashboard"])
+
+    df = load_data()
+    # Most recent sample, shared by both metric panels
+    latest = df.iloc[-1] if not df.empty else None
+
+    with tab_main:
+        # Display visualizations; explicit keys keep the charts distinct when two draw the
+        # same figure, e.g. both maps colored by ph_corrected_ma
+        if not df.empty and selected_params:
+            st.plotly_chart(create_map_plot(df, selected_params), use_container_width=True, key="map")
+            st.plotly_chart(create_timeseries_plot(df, selected_params), use_container_width=True, key="timeseries")
+            st.subheader("Current Statistics")
+            if not df.empty:
+                means = df[[param for param in selected_params if param in df.columns]].mean()
+                cols = st.columns(len(selected_params))
+                for i, param in enumerate(selected_params):
+                    with cols[i]:
+                        if param in df.columns:
+                            value = latest[param]
+                            mean_val = means[param]
+                            st.metric(
+                                label=param.capitalize(),
+                                value=f"{value:.2f}",
+                                delta=f"{value - mean_val:.2f} vs avg"
+                            )
+        elif not selected_params:
+            st.info("Please select at least one parameter to visualize from the sidebar.")
+
+    with tab_deployment:
+
+        # Time series plot for pH Corrected MA
+        ph_timeseries_col, ph_indicator_col = st.columns([3, 1])
+
+        with ph_timeseries_col:
+            if not df.empty:
+                st.plotly_chart(create_ph_timeseries_plot(df), use_container_width=True, key="ph_timeseries")
+            else:
+                st.warning("⚠️ No data available for pH Corrected MA")
+
+        with ph_indicator_col:
+            if not df.empty and "ph_corrected_ma" in df.columns:
+                latest_ph_corrected_ma = latest["ph_corrected_ma"]
+                mean_ph_corrected_ma = df["ph_corrected_ma"].mean()
+                st.metric(
+                    label="pH moving average",
+                    value=f"{latest_ph_corrected_ma:.2f}",
+                    delta=f"{latest_ph_corrected_ma - mean_ph_corrected_ma:.2f} vs avg",
+                    delta_color="inverse"
+                )
+            else:
+                st.info("No data available for pH Corrected MA")
+
+        # Map plot for pH Corrected MA
         if not df.empty:
-            st.plotly_chart(create_ph_timeseries_plot(df), use_container_width=True)
+            st.plotly_chart(create_map_plot(df, ["ph_corrected_ma"]), use_container_width=True, key="ph_map")
         else:
             st.warning("⚠️ No data available for pH Corrected MA")
 
-    with ph_indicator_col:
-        if not df.empty and "ph_corrected_ma" in df.columns:
-            latest_ph_corrected_ma = df.iloc[-1]["ph_corrected_ma"]
-            mean_ph_corrected_ma = df["ph_corrected_ma"].mean()
-            st.metric(
-                label="pH moving average",
-                value=f"{latest_ph_corrected_ma:.2f}",
-                delta=f"{latest_ph_corrected_ma - mean_ph_corrected_ma:.2f} vs avg",
-                delta_color="inverse"
-            )
-        else:
-            st.info("No data available for pH Corrected MA")
-
-    # Map plot for pH Corrected MA
-    if not df.empty:
-        st.plotly_chart(create_map_plot(df, ["ph_corrected_ma"]), use_container_width=True)
-    else:
-        st.warning("⚠️ No data available for pH Corrected MA")
+live_panel()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,53 @@
+import sqlite3
+import time
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+from locness_app import config
+from locness_app.data import DATA_COLUMNS
+from locness_app.migrate import migrate_database
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A day of 1 Hz rows ending now, wired in as the app's data source."""
+    path = tmp_path / "underway.sqlite"
+    n = 86_400
+    times = int(time.time()) - n + np.arange(n)
+    values = np.random.default_rng(0).normal(8, 0.1, size=(n, len(DATA_COLUMNS)))
+    conn = sqlite3.connect(path)
+    columns = ", ".join(f"{col} REAL" for col in DATA_COLUMNS)
+    conn.execute(f"CREATE TABLE {config.db_table} (datetime_utc INTEGER, {columns})")
+    conn.executemany(f"INSERT INTO {config.db_table} VALUES ({', '.join('?' * (len(DATA_COLUMNS) + 1))})",
+                     [(int(t), *row) for t, row in zip(times, values.tolist())])
+    conn.commit()
+    conn.close()
+    migrate_database(path, config.db_table)
+    # main.py imports file_path on every run, so patching the module attribute is enough
+    monkeypatch.setattr(config, "file_path", str(path))
+    return path
+
+def test_main_renders(db_path):
+    at = AppTest.from_file("../main.py", default_timeout=60)
+    at.run()
+    assert not at.exception
+    assert len(at.get("plotly_chart")) == 4
+    assert at.sidebar.markdown[0].value.startswith("✅ Data loaded")
+    assert "**Total records in data source:** 86400" in at.sidebar.markdown[0].value
+
+    # Widening the window and switching resampling go through Apply together
+    at.sidebar.selectbox[0].select("No resampling")
+    at.sidebar.slider[0].set_value(48)
+    at.sidebar.button[1].click().run()
+    assert not at.exception
+    assert at.sidebar.markdown[0].value.startswith("✅ Data loaded: 86400 records")
+
+def test_main_renders_without_data(tmp_path, monkeypatch):
+    path = tmp_path / "empty.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE {config.db_table} (datetime_utc INTEGER, {', '.join(DATA_COLUMNS)})")
+    conn.close()
+    monkeypatch.setattr(config, "file_path", str(path))
+    at = AppTest.from_file("../main.py", default_timeout=60)
+    at.run()
+    assert not at.exception
+    assert "No data available" in at.sidebar.warning[0].value
@@ -0,0 +1,190 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+import streamlit as st
+from locness_app.data import (DATA_COLUMNS, get_data_relation, read_data, update_with_new_data, prepend_older_data,
+                              get_conn, get_data_for_plotting, get_total_records)
+from locness_app.migrate import migrate_database
+
+DB_TABLE = "underway_summary"
+START = 1_750_000_000
+
+def make_rows(start, n, step=7, seed=0):
+    """Rows of (datetime_utc, *DATA_COLUMNS) at irregular-ish spacing, with a few NULLs."""
+    rng = np.random.default_rng(seed)
+    times = start + np.cumsum(rng.integers(1, step, n))
+    values = rng.normal(size=(n, len(DATA_COLUMNS)))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return [(int(t), *(None if np.isnan(x) else float(x) for x in row)) for t, row in zip(times, values)]
+
+def insert(conn, rows):
+    placeholders = ", ".join("?" * (len(DATA_COLUMNS) + 1))
+    conn.executemany(f"INSERT INTO {DB_TABLE} VALUES ({placeholders})", rows)
+    conn.commit()
+
+def full_read(conn, time_cutoff=None, resample_freq=None):
+    query, params = get_data_relation(None, DB_TABLE, time_cutoff, resample_freq)
+    return read_data(conn, query, params)
+
+def create_table(conn):
+    columns = ", ".join(f"{col} REAL" for col in DATA_COLUMNS)
+    conn.execute(f"CREATE TABLE {DB_TABLE} (datetime_utc INTEGER, {columns})")
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    create_table(conn)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A migrated database file; a second connection stands in for the logger."""
+    path = str(tmp_path / "underway.sqlite")
+    conn = sqlite3.connect(path)
+    create_table(conn)
+    conn.close()
+    migrate_database(path, DB_TABLE)
+    return path
+
+@pytest.fixture
+def session_state(monkeypatch):
+    """A plain dict in place of st.session_state, so each test is one fresh session."""
+    state = {}
+    monkeypatch.setattr(st, "session_state", state)
+    return state
+
+@pytest.mark.parametrize("resample_freq", [None, "10s", "1min"])
+def test_update_with_new_data_matches_full_read(conn, resample_freq):
+    rows = make_rows(START, 3000)
+    insert(conn, rows[:1000])
+    df = full_read(conn, resample_freq=resample_freq)
+    # Appends land mid-bucket, so the last resampled bucket has to be re-read
+    for chunk in (rows[1000:1001], rows[1001:1500], [], rows[1500:]):
+        insert(conn, chunk)
+        df = update_with_new_data(conn, DB_TABLE, df, resample_freq)
+        pdt.assert_frame_equal(df, full_read(conn, resample_freq=resample_freq))
+
+@pytest.mark.parametrize("resample_freq", [None, "10s", "1min"])
+def test_update_with_new_data_from_empty(conn, resample_freq):
+    df = full_read(conn, resample_freq=resample_freq)
+    assert df.empty
+    insert(conn, make_rows(START, 500))
+    df = update_with_new_data(conn, DB_TABLE, df, resample_freq)
+    pdt.assert_frame_equal(df, full_read(conn, resample_freq=resample_freq))
+
+@pytest.mark.parametrize("resample_freq", [None, "10s", "1min"])
+def test_prepend_older_data_matches_full_read(conn, resample_freq):
+    insert(conn, make_rows(START, 3000))
+    # get_data_for_plotting trims the cached frame to its cutoff before widening it
+    cutoff = START + 6_000
+    df = full_read(conn, cutoff, resample_freq)
+    df = df.iloc[df.index.searchsorted(cutoff):]
+    for older_cutoff in (START + 4_000, START + 3_999, START):
+        df = prepend_older_data(conn, DB_TABLE, df, older_cutoff, resample_freq)
+        # As in the caller, drop a leading bucket that straddles a mid-bucket cutoff
+        df = df.iloc[df.index.searchsorted(older_cutoff):]
+        expected = full_read(conn, older_cutoff, resample_freq)
+        pdt.assert_frame_equal(df, expected.iloc[expected.index.searchsorted(older_cutoff):])
+
+def test_resampled_read_matches_pandas(conn):
+    rows = make_rows(START, 2000, step=20)
+    # A dropout long enough to leave whole buckets with no readings for one column
+    rows = [(t, *values[:2], None, *values[3:]) if START + 5_000 < t < START + 6_000 else (t, *values)
+            for t, *values in rows]
+    insert(conn, rows)
+    raw = pd.DataFrame(rows, columns=("datetime_utc",) + DATA_COLUMNS, dtype=float)
+    raw.index = pd.to_datetime(raw.pop("datetime_utc"), unit="s")
+    expected = raw.resample("1min").mean().dropna()
+    df = full_read(conn, resample_freq="1min")
+    np.testing.assert_array_equal(df.index, (expected.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+    np.testing.assert_allclose(df.to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+def test_total_records_counts_rows_at_or_before_the_latest_timestamp(db_path, session_state):
+    writer = sqlite3.connect(db_path)
+    rows = make_rows(START, 1000)
+    insert(writer, rows)
+    assert get_total_records(db_path, DB_TABLE) == 1000
+    # Same-second and late-arriving rows still count once they are committed
+    last = rows[-1][0]
+    insert(writer, [(last, *rows[-1][1:]), (last - 600, *rows[0][1:])])
+    assert get_total_records(db_path, DB_TABLE) == 1002
+    insert(writer, make_rows(last, 10))
+    assert get_total_records(db_path, DB_TABLE) == 1012
+    session_state.clear()
+    assert get_total_records(db_path, DB_TABLE) == 1012
+    writer.close()
+
+def test_total_records_reuses_the_count_until_a_write(db_path, session_state):
+    writer = sqlite3.connect(db_path)
+    insert(writer, make_rows(START, 100))
+    assert get_total_records(db_path, DB_TABLE) == 100
+    key, total = session_state["total_records"]
+    # A stale cached total is returned as long as data_version has not moved
+    session_state["total_records"] = (key, -1)
+    assert get_total_records(db_path, DB_TABLE) == -1
+    insert(writer, make_rows(START + 10_000, 5))
+    assert get_total_records(db_path, DB_TABLE) == 105
+    writer.close()
+
+def expected_window(db_path, time_cutoff, resample_freq):
+    """A fresh read of the window, trimmed at the cutoff the way get_data_for_plotting trims."""
+    conn = sqlite3.connect(db_path)
+    df = full_read(conn, time_cutoff, resample_freq)
+    conn.close()
+    return df.iloc[df.index.searchsorted(time_cutoff):]
+
+@pytest.mark.parametrize("resample_freq", [None, "1min"])
+def test_data_for_plotting_cold_and_warm_reads(db_path, session_state, resample_freq):
+    writer = sqlite3.connect(db_path)
+    rows = make_rows(START, 3000)
+    insert(writer, rows[:2000])
+    cutoff = START + 1_003
+    df = get_data_for_plotting(db_path, DB_TABLE, cutoff, resample_freq)
+    pdt.assert_frame_equal(df, expected_window(db_path, cutoff, resample_freq))
+    # Nothing committed since: only the version check reaches SQLite
+    statements = []
+    get_conn(db_path, DB_TABLE).set_trace_callback(statements.append)
+    pdt.assert_frame_equal(get_data_for_plotting(db_path, DB_TABLE, cutoff, resample_freq), df)
+    get_conn(db_path, DB_TABLE).set_trace_callback(None)
+    assert statements == ["PRAGMA data_version"]
+    insert(writer, rows[2000:])
+    df = get_data_for_plotting(db_path, DB_TABLE, cutoff, resample_freq)
+    pdt.assert_frame_equal(df, expected_window(db_path, cutoff, resample_freq))
+    # A different resample setting starts over from a full read
+    df = get_data_for_plotting(db_path, DB_TABLE, cutoff, "10s")
+    pdt.assert_frame_equal(df, expected_window(db_path, cutoff, "10s"))
+    writer.close()
+
+@pytest.mark.parametrize("resample_freq", [None, "1min"])
+def test_data_for_plotting_widens_the_window(db_path, session_state, resample_freq):
+    writer = sqlite3.connect(db_path)
+    insert(writer, make_rows(START, 3000))
+    writer.close()
+    get_data_for_plotting(db_path, DB_TABLE, START + 6_003, resample_freq)
+    # Earlier cutoffs read only the missing span, including one that straddles a bucket
+    for cutoff in (START + 4_000, START + 3_999, None):
+        statements = []
+        get_conn(db_path, DB_TABLE).set_trace_callback(statements.append)
+        df = get_data_for_plotting(db_path, DB_TABLE, cutoff, resample_freq)
+        get_conn(db_path, DB_TABLE).set_trace_callback(None)
+        selects = [sql for sql in statements if sql.startswith("SELECT")]
+        assert len(selects) == 1 and "datetime_utc < " in selects[0]
+        pdt.assert_frame_equal(df, expected_window(db_path, cutoff or 0, resample_freq))
+
+@pytest.mark.parametrize("resample_freq", [None, "1min"])
+def test_data_for_plotting_trims_a_sliding_cutoff(db_path, session_state, resample_freq):
+    writer = sqlite3.connect(db_path)
+    insert(writer, make_rows(START, 3000))
+    writer.close()
+    get_data_for_plotting(db_path, DB_TABLE, START + 1_000, resample_freq)
+    # A later cutoff is served from the session's frame without querying
+    for cutoff in (START + 1_001, START + 1_030, START + 1_031, START + 5_000):
+        statements = []
+        get_conn(db_path, DB_TABLE).set_trace_callback(statements.append)
+        df = get_data_for_plotting(db_path, DB_TABLE, cutoff, resample_freq)
+        get_conn(db_path, DB_TABLE).set_trace_callback(None)
+        assert statements == ["PRAGMA data_version"]
+        pdt.assert_frame_equal(df, expected_window(db_path, cutoff, resample_freq))
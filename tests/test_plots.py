@@ -0,0 +1,83 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from locness_app.data import DATA_COLUMNS, DATA_DTYPE
+from locness_app.plots import QUANTILE_MIN_POINTS, build_map_plot, frame_key, m4_buckets, m4_indices
+
+def make_frame(n, seed=0):
+    """A frame shaped like read_data's output: epoch-second index, float32 columns."""
+    rng = np.random.default_rng(seed)
+    index = pd.Index(1_750_000_000 + np.arange(n, dtype=np.int64), name="datetime_utc")
+    return pd.DataFrame(rng.normal(size=(n, len(DATA_COLUMNS))).astype(DATA_DTYPE), index=index, columns=DATA_COLUMNS)
+
+def brute_force_m4(v, starts):
+    """First, last, and first-occurring min and max position of each bucket, one bucket at a time."""
+    n = len(v)
+    picked = set()
+    for start, end in zip(starts, np.r_[starts[1:], n]):
+        bucket = v[start:end]
+        picked.update((start, end - 1))
+        if not np.isnan(bucket).all():
+            picked.update((start + np.nanargmin(bucket), start + np.nanargmax(bucket)))
+    return np.array(sorted(picked))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_m4_indices_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = 20_000
+    t = np.sort(rng.integers(0, 10**6, n))
+    # Rounding forces ties, so the first occurrence of each extreme is what gets kept
+    v = rng.normal(size=n).round(1).astype(np.float32)
+    v[rng.random(n) < 0.1] = np.nan
+    # An all-NaN stretch covering whole buckets
+    v[5_000:6_000] = np.nan
+    starts = m4_buckets(t, n_bins=500)
+    np.testing.assert_array_equal(m4_indices(v, starts), brute_force_m4(v, starts))
+
+def test_m4_indices_keeps_short_series_whole():
+    t = np.arange(100)
+    starts = m4_buckets(t, n_bins=500)
+    assert starts is None
+    np.testing.assert_array_equal(m4_indices(np.zeros(100), starts), np.arange(100))
+
+@pytest.mark.parametrize("n", [QUANTILE_MIN_POINTS - 1, 10_000])
+def test_map_color_bounds(n):
+    df = make_frame(n)
+    df.iloc[::7, df.columns.get_loc("temp")] = np.nan
+    marker = build_map_plot(df, "temp").data[0].marker
+    temp = df["temp"]
+    if n < QUANTILE_MIN_POINTS:
+        assert (marker.cmin, marker.cmax) == (temp.min(), temp.max())
+    else:
+        assert marker.cmin == pytest.approx(temp.quantile(0.05))
+        assert marker.cmax == pytest.approx(temp.quantile(0.95))
+
+@pytest.mark.parametrize("n", [QUANTILE_MIN_POINTS - 1, 10_000])
+def test_map_all_nan_color_is_silent(n):
+    df = make_frame(n)
+    df["temp"] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        marker = build_map_plot(df, "temp").data[0].marker
+    assert marker.cmin is None and marker.cmax is None
+
+def test_frame_key_tracks_the_ways_a_plot_frame_changes():
+    df = make_frame(1000)
+    assert frame_key(df) == frame_key(df.copy())
+    # A resampled final bucket still filling keeps the length and both ends
+    filling = df.copy()
+    filling.iloc[-1, 0] += 1
+    # Trimmed at the start, appended, ended earlier, and still filling
+    changed = [df.iloc[1:], pd.concat([df, make_frame(1001).iloc[-1:]]), df.iloc[:-1], filling]
+    keys = {frame_key(df)} | {frame_key(other) for other in changed}
+    assert len(keys) == len(changed) + 1
+    assert frame_key(df.iloc[:0]) == frame_key(make_frame(0))
+
+def test_cached_figure_is_rebuilt_when_the_last_bucket_changes():
+    df = make_frame(1000)
+    fig = build_map_plot(df, "temp")
+    assert build_map_plot(df.copy(), "temp") == fig
+    filling = df.copy()
+    filling.iloc[-1, filling.columns.get_loc("temp")] += 1
+    assert build_map_plot(filling, "temp") != fig